@@ -3,6 +3,7 @@
 import sys
 import os
 import json
+import html
 from datetime import datetime
 from PyQt6.QtWidgets import (
     QApplication, QWidget, QVBoxLayout, QHBoxLayout,
@@ -10,11 +11,23 @@ from PyQt6.QtWidgets import (
     QListWidget, QListWidgetItem, QSplitter, QMessageBox
 )
 from PyQt6.QtGui import QTextCursor
-from PyQt6.QtCore import Qt
+from PyQt6.QtCore import Qt, QTimer
 
 from app.chat_engine import ChatEngine
 from app.UI.setup_form import SetupForm
 from app.session_history import SessionHistory
+from app.session_prefetch import SessionPrefetcher
+from app.markdown_renderer import renderer
+
+# how many of the newest sessions to load in the background on startup
+PREFETCH_RECENT = 5
+# quiet time after the last chat turn before the warm engine is rebuilt
+WARM_ENGINE_DELAY_MS = 5000
+
+
+def shows_as_ai(role):
+    # anything not from the user (incl. system/context in older files) is shown as AI markdown
+    return role != "user"
 
 
 class MainWindow(QWidget):
@@ -22,6 +35,13 @@ class MainWindow(QWidget):
         super().__init__()
         self.engine = ChatEngine()
         self.history = SessionHistory()
+        self.prefetcher = SessionPrefetcher(on_load=self.warm_render_cache)
+        self.prefetcher.warm_engine()
+        # rebuilding the warm engine is debounced, so a fast conversation triggers one build
+        self.warm_timer = QTimer(self)
+        self.warm_timer.setSingleShot(True)
+        self.warm_timer.setInterval(WARM_ENGINE_DELAY_MS)
+        self.warm_timer.timeout.connect(self.prefetcher.warm_engine)
 
         self.setWindowTitle("ThatsMyAI")
         self.setGeometry(100, 100, 800, 600)
@@ -35,6 +55,9 @@ class MainWindow(QWidget):
         # Session List Panel
         self.session_list = QListWidget()
         self.session_list.itemClicked.connect(self.load_selected_session)
+        # hovering a session starts loading it before it is clicked
+        self.session_list.setMouseTracking(True)
+        self.session_list.itemEntered.connect(self.prefetch_session)
         self.splitter.addWidget(self.session_list)
 
         self.button_panel = QVBoxLayout()
@@ -44,6 +67,13 @@ class MainWindow(QWidget):
         self.delete_btn.clicked.connect(self.delete_session)
         self.button_panel.addWidget(self.new_btn)
         self.button_panel.addWidget(self.delete_btn)
+        self.cache_label = QLabel()
+        self.cache_label.setWordWrap(True)
+        self.button_panel.addStretch()
+        self.button_panel.addWidget(self.cache_label)
+        self.usage_label = QLabel()
+        self.usage_label.setWordWrap(True)
+        self.button_panel.addWidget(self.usage_label)
 
         btn_container = QWidget()
         btn_container.setLayout(self.button_panel)
@@ -102,6 +132,7 @@ class MainWindow(QWidget):
         # Get AI response
         response = self.engine.send_message(user_input)
         self.append_message("AI", response)
+        self.update_usage_label()
 
         # Refresh session list if this is a newly named session
         if (
@@ -113,15 +144,32 @@ class MainWindow(QWidget):
         ):
             self.load_session_list()
 
+        # New messages change the cross-session context, so the warm engine is out of date
+        self.invalidate_warm_engine()
+
         # Clear input field
         self.input_field.clear()
 
+    def message_html(self, sender, content):
+        # AI replies are markdown, everything else is shown as plain text
+        if sender == "AI":
+            body = renderer.render(content)
+        else:
+            body = html.escape(content).replace("\n", "<br>")
+        return f"<p><b>{sender}:</b></p>{body}<p></p>"
+
     def append_message(self, sender, content):
-        self.chat_log.append(f"<b>{sender}:</b>")
-        self.chat_log.append(f"{content}")
-        self.chat_log.append("")  # Add spacing
+        self.chat_log.append(self.message_html(sender, content))
         self.chat_log.moveCursor(QTextCursor.MoveOperation.End)
 
+    @staticmethod
+    def warm_render_cache(data):
+        # runs on the prefetch thread, so opening the session only hits the cache
+        renderer.warm(
+            entry["content"] for entry in data
+            if isinstance(entry, dict) and "role" in entry and "content" in entry and shows_as_ai(entry["role"])
+        )
+
     def handle_export(self):
         new_title = self.engine.generate_session_title()
         if new_title:
@@ -137,6 +185,11 @@ class MainWindow(QWidget):
     def handle_regen_personality(self):
         result = self.engine.send_message("regen_personality")
         self.append_message("Updated Personality", result)
+        self.invalidate_warm_engine()
+
+    def invalidate_warm_engine(self):
+        self.prefetcher.mark_engine_stale()
+        self.warm_timer.start()
 
     def load_session_list(self):
         self.session_list.clear()
@@ -145,25 +198,47 @@ class MainWindow(QWidget):
             item = QListWidgetItem(session["title"])
             item.setData(Qt.ItemDataRole.UserRole, session["title"])
             self.session_list.addItem(item)
+        for session in sessions[:PREFETCH_RECENT]:
+            self.prefetcher.prefetch(session["title"])
+        self.update_cache_label()
+
+    def prefetch_session(self, item):
+        self.prefetcher.prefetch(item.data(Qt.ItemDataRole.UserRole))
+
+    def update_usage_label(self):
+        usage = self.engine.last_usage
+        if usage:
+            # cached = prompt tokens the provider served from its prefix cache
+            self.usage_label.setText(
+                f"Last reply: {usage['prompt_tokens']} prompt tokens, {usage['cached_tokens'] or 0} cached"
+            )
+
+    def update_cache_label(self):
+        stats = self.prefetcher.stats()
+        self.cache_label.setText(
+            f"Cache: {stats['sessions']} sessions, {stats['memory_bytes'] / 1024:.0f} KB in memory, "
+            f"hit rate {stats['hit_rate']:.0%}"
+        )
 
     def load_selected_session(self, item):
         selected_name = item.data(Qt.ItemDataRole.UserRole)
-        self.engine = ChatEngine(session_name=selected_name)
+        transcript = self.prefetcher.get(selected_name)
+        self.engine = ChatEngine(session_name=selected_name, transcript=transcript)
         self.refresh_chat()
+        self.update_cache_label()
 
     def refresh_chat(self):
-        self.chat_log.clear()
         self.setWindowTitle(f"ThatsMyAI – {self.engine.session_name}")
+        # build the whole log and set it once instead of one append per message
+        parts = []
         for msg in self.engine.messages:
-            if not isinstance(msg, dict):
-                continue
-            if "role" not in msg or "content" not in msg:
-                continue
-            role = "You" if msg["role"] == "user" else "AI"
-            self.append_message(role, msg["content"])
+            role = "AI" if shows_as_ai(msg.role) else "You"
+            parts.append(self.message_html(role, msg.content))
+        self.chat_log.setHtml("".join(parts))
+        self.chat_log.moveCursor(QTextCursor.MoveOperation.End)
 
     def start_new_session(self):
-        self.engine = ChatEngine()
+        self.engine = self.prefetcher.take_engine()
         self.chat_log.clear()
         self.setWindowTitle("ThatsMyAI – New Session")
         self.load_session_list()
@@ -178,9 +253,17 @@ class MainWindow(QWidget):
                                      QMessageBox.StandardButton.Yes | QMessageBox.StandardButton.No)
         if reply == QMessageBox.StandardButton.Yes:
             self.history.delete_session(name)
+            self.prefetcher.discard(name)
+            # the warm engine's context may contain the deleted session, take_engine rebuilds it
+            self.prefetcher.mark_engine_stale()
             self.load_session_list()
             self.start_new_session()
 
+    def closeEvent(self, event):
+        self.warm_timer.stop()
+        self.prefetcher.shutdown()
+        super().closeEvent(event)
+
 
 def run_gui():
     app = QApplication(sys.argv)
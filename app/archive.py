@@ -0,0 +1,167 @@
+# app/archive.py
+
+import gzip
+import hashlib
+import json
+import os
+import struct
+
+MAGIC = b"TMAI-ARCHIVE-1\n"
+# kind, name length, payload size, sha256 of payload
+HEADER = struct.Struct(">cHQ32s")
+CHUNK_SIZE = 64 * 1024
+
+SESSION = b"S"
+CONFIG = b"C"
+MANIFEST = b"M"
+END = b"E"
+
+
+def _file_digest(path):
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(CHUNK_SIZE), b""):
+            digest.update(chunk)
+    return digest.digest()
+
+
+def _iter_sources(memory_dir, config_dir):
+    if os.path.isdir(memory_dir):
+        for filename in sorted(os.listdir(memory_dir)):
+            if filename.endswith(".json"):
+                yield SESSION, filename, os.path.join(memory_dir, filename)
+
+    if os.path.isdir(config_dir):
+        for root, _, files in os.walk(config_dir):
+            for filename in sorted(files):
+                path = os.path.join(root, filename)
+                yield CONFIG, os.path.relpath(path, config_dir).replace(os.sep, "/"), path
+
+
+def _write_record(out, kind, name, size, digest):
+    encoded = name.encode("utf-8")
+    out.write(HEADER.pack(kind, len(encoded), size, digest))
+    out.write(encoded)
+
+
+def export_archive(archive_path, memory_dir="memory", config_dir="config"):
+    """Pack every session file and the config folder into one gzip'd archive.
+
+    Files are streamed one at a time, so memory use does not grow with the
+    number of sessions. A JSON manifest of everything written closes the archive.
+    """
+    manifest = []
+    with gzip.open(archive_path, "wb") as out:
+        out.write(MAGIC)
+        for kind, name, path in _iter_sources(memory_dir, config_dir):
+            try:
+                digest = _file_digest(path)
+                size = os.path.getsize(path)
+                _write_record(out, kind, name, size, digest)
+                with open(path, "rb") as f:
+                    remaining = size
+                    while remaining:
+                        chunk = f.read(min(CHUNK_SIZE, remaining))
+                        if not chunk:
+                            raise IOError("file shrank while exporting")
+                        out.write(chunk)
+                        remaining -= len(chunk)
+            except Exception as e:
+                # a half-written record would corrupt the rest of the stream
+                raise IOError(f"Failed to export {path}: {e}") from e
+            manifest.append({
+                "kind": kind.decode(),
+                "name": name,
+                "size": size,
+                "sha256": digest.hex()
+            })
+
+        payload = json.dumps({"files": manifest}).encode("utf-8")
+        _write_record(out, MANIFEST, "manifest.json", len(payload), hashlib.sha256(payload).digest())
+        out.write(payload)
+        _write_record(out, END, "", 0, bytes(32))
+
+    return len(manifest)
+
+
+def _safe_target(base_dir, name):
+    target = os.path.normpath(os.path.join(base_dir, name))
+    base = os.path.normpath(base_dir)
+    if os.path.isabs(name) or os.path.commonpath([base, target]) != base:
+        raise ValueError(f"Refusing to write outside {base_dir}: {name}")
+    return target
+
+
+def _read_exact(src, size):
+    data = src.read(size)
+    if len(data) != size:
+        raise ValueError("Archive is truncated")
+    return data
+
+
+def _skip(src, size):
+    while size:
+        size -= len(_read_exact(src, min(CHUNK_SIZE, size)))
+
+
+def import_archive(archive_path, memory_dir="memory", config_dir="config", force=False):
+    """Restore an archive made by export_archive.
+
+    Files that already exist with the same content hash are skipped. Existing
+    files with different content are kept unless `force` is set, so a newer
+    local session is never replaced by an older backup by accident. Anything
+    written is streamed to a temp file, verified and then moved into place.
+    Returns counts of written, overwritten, skipped and conflicting files.
+    """
+    stats = {"written": 0, "overwritten": 0, "skipped": 0, "conflicts": 0}
+    with gzip.open(archive_path, "rb") as src:
+        if src.read(len(MAGIC)) != MAGIC:
+            raise ValueError("Not a ThatsMyAI archive")
+
+        while True:
+            kind, name_len, size, digest = HEADER.unpack(_read_exact(src, HEADER.size))
+            name = _read_exact(src, name_len).decode("utf-8")
+
+            if kind == END:
+                break
+            if kind == MANIFEST:
+                _skip(src, size)
+                continue
+            if kind == SESSION:
+                target = _safe_target(memory_dir, name)
+            elif kind == CONFIG:
+                target = _safe_target(config_dir, name)
+            else:
+                raise ValueError(f"Unknown record type {kind!r} for {name}")
+
+            exists = os.path.exists(target)
+            if exists and _file_digest(target) == digest:
+                _skip(src, size)
+                stats["skipped"] += 1
+                continue
+            if exists and not force:
+                print(f"[⚠️] Keeping local {target}, it differs from the archive (use --force to replace)")
+                _skip(src, size)
+                stats["conflicts"] += 1
+                continue
+
+            os.makedirs(os.path.dirname(target) or ".", exist_ok=True)
+            tmp_path = target + ".importing"
+            check = hashlib.sha256()
+            try:
+                with open(tmp_path, "wb") as f:
+                    remaining = size
+                    while remaining:
+                        chunk = _read_exact(src, min(CHUNK_SIZE, remaining))
+                        check.update(chunk)
+                        f.write(chunk)
+                        remaining -= len(chunk)
+                if check.digest() != digest:
+                    raise ValueError(f"Checksum mismatch for {name}")
+                os.replace(tmp_path, target)
+            finally:
+                if os.path.exists(tmp_path):
+                    os.remove(tmp_path)
+            stats["overwritten" if exists else "written"] += 1
+
+    return stats
@@ -0,0 +1,160 @@
+# app/batch.py
+
+import json
+import os
+import sys
+from contextlib import redirect_stdout
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, wait
+from datetime import datetime
+
+from .chat_engine import ChatEngine
+
+DEFAULT_SESSION = "batch"
+# kept apart from memory/ so batch traffic never shows up in the GUI or its context
+BATCH_MEMORY_DIR = "batch_memory"
+
+
+class BatchRunner:
+    """Runs JSONL prompts through ChatEngine without a human at the keyboard.
+
+    Each input line looks like {"session": "...", "prompt": "...", "id": ...}.
+    Different sessions run concurrently (up to `concurrency` at once) while
+    prompts for the same session are sent one after another, in input order.
+    One JSONL reply record is written to `out` as soon as each prompt finishes.
+    Prompts are sent as plain text, the chat commands (export_summary, ...) are
+    not interpreted. With history=False nothing is loaded from or saved to
+    `memory_dir`, so the same input always produces the same requests.
+    """
+
+    def __init__(self, concurrency=4, out=None, engine_factory=ChatEngine,
+                 memory_dir=BATCH_MEMORY_DIR, history=True):
+        self.out = out or sys.stdout
+        self.engine_factory = engine_factory
+        self.memory_dir = memory_dir
+        self.history = history
+        self.executor = ThreadPoolExecutor(max_workers=max(1, concurrency))
+        self.engines = {}
+        # session -> queue of jobs waiting for that session's worker
+        self.pending = {}
+        self.futures = []
+        self.lock = threading.Lock()
+        self.out_lock = threading.Lock()
+        self.line_no = 0
+
+    def run(self, lines):
+        for line in lines:
+            self.line_no += 1
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                job = json.loads(line)
+                if not isinstance(job, dict) or not isinstance(job.get("prompt"), str):
+                    raise ValueError("expected an object with a string 'prompt'")
+                job["session"] = _session_name(job.get("session"))
+            except ValueError as e:
+                self._emit({"line": self.line_no, "error": f"Invalid input: {e}"})
+                continue
+            job.setdefault("id", self.line_no)
+            self.submit(job)
+
+        wait(self.futures)
+        self.executor.shutdown()
+        for future in self.futures:
+            if future.exception() is not None:
+                print(f"[❌] Batch worker failed: {future.exception()}", file=sys.stderr)
+
+    def submit(self, job):
+        session = job["session"]
+        with self.lock:
+            queue = self.pending.get(session)
+            if queue is not None:
+                # a worker is already draining this session, it will pick this up
+                queue.append(job)
+                return
+            self.pending[session] = deque([job])
+        self.futures.append(self.executor.submit(self._drain, session))
+
+    def _drain(self, session):
+        engine = self.engines.get(session)
+        if engine is None:
+            try:
+                engine = self.engine_factory(session_name=session, memory_dir=self.memory_dir,
+                                             persist=self.history)
+            except Exception as e:
+                self._fail_session(session, f"Failed to start session: {e}")
+                return
+            self.engines[session] = engine
+
+        while True:
+            with self.lock:
+                queue = self.pending[session]
+                if not queue:
+                    del self.pending[session]
+                    return
+                job = queue.popleft()
+            self._run_job(session, engine, job)
+
+    def _fail_session(self, session, error):
+        with self.lock:
+            jobs = self.pending.pop(session, ())
+        for job in jobs:
+            self._emit({"id": job["id"], "session": session, "error": error})
+
+    def _run_job(self, session, engine, job):
+        started = datetime.now()
+        t0 = time.perf_counter()
+        try:
+            reply = engine.send_message(job["prompt"], commands=False)
+            error = engine.last_error
+        except Exception as e:
+            reply, error = None, str(e)
+        elapsed_ms = round((time.perf_counter() - t0) * 1000, 1)
+
+        usage = getattr(engine, "last_usage", None) or {}
+        record = {
+            "id": job["id"],
+            "session": session,
+            "reply": reply,
+            "started": started.isoformat(),
+            "elapsed_ms": elapsed_ms,
+            "prompt_tokens": usage.get("prompt_tokens"),
+            "completion_tokens": usage.get("completion_tokens"),
+            "total_tokens": usage.get("total_tokens"),
+            "cached_tokens": usage.get("cached_tokens"),
+        }
+        if error:
+            record["error"] = error
+        self._emit(record)
+
+    def _emit(self, record):
+        with self.out_lock:
+            self.out.write(json.dumps(record, ensure_ascii=False) + "\n")
+            self.out.flush()
+
+
+def _session_name(value):
+    # the session name becomes <memory_dir>/<session>.json, so it must stay a plain filename
+    session = str(value or DEFAULT_SESSION)
+    separators = [sep for sep in (os.sep, os.altsep, "/", "\\") if sep]
+    if session in (".", "..") or any(sep in session for sep in separators):
+        raise ValueError(f"session name must not contain path separators: {session!r}")
+    return session
+
+
+def run_batch(source="-", output="-", concurrency=4, memory_dir=BATCH_MEMORY_DIR, history=True):
+    infile = sys.stdin if source == "-" else open(source, "r", encoding="utf-8")
+    outfile = sys.stdout if output == "-" else open(output, "w", encoding="utf-8")
+    try:
+        runner = BatchRunner(concurrency=concurrency, out=outfile, memory_dir=memory_dir, history=history)
+        # the engine's diagnostics go to stderr so stdout stays pure JSONL
+        with redirect_stdout(sys.stderr):
+            runner.run(infile)
+    finally:
+        if infile is not sys.stdin:
+            infile.close()
+        if outfile is not sys.stdout:
+            outfile.close()
@@ -5,73 +5,72 @@ from datetime import datetime
 import json
 import glob
 
+from .prompt_builder import PromptPrefix
+from .transcript import Message, Transcript
+
 class ChatEngine:
-    def __init__(self, session_name=None):
+    def __init__(self, session_name=None, transcript=None, memory_dir="memory", persist=True):
         self.chat_initialized = False
+        # persist=False neither loads nor saves any session history (e.g. batch regression runs)
+        self.persist = persist
         self.prompt_count = 0
+        # token usage / error from the most recent send_message call
+        self.last_usage = None
+        self.last_error = None
         load_dotenv()
         api_key = os.getenv("OPENAI_API_KEY")
         self.client = OpenAI(api_key=api_key)
     
         # Points to the memory folder
-        self.memory_dir = os.path.join("memory")
-        os.makedirs(self.memory_dir, exist_ok=True)
-    
-        # Start with user-defined personality
-        system_message = {
-            "role": "system",
-            "content": self._load_user_profile()
-        }
-        self.messages = [system_message] + self._load_context_from_all_sessions(limit=25)
+        self.memory_dir = memory_dir
+        if persist:
+            os.makedirs(self.memory_dir, exist_ok=True)
+
         # a unique name for the chat session
         if session_name:
             self.session_name = session_name
         else:
-            self.session_name = "session_" + datetime.now().strftime("%Y-%m-%d_%H-%M-%S")
+            self.session_name = self._new_session_name()
         # the full file path like memory/session_2025-04-10_15-30-22.json
         self.memory_file = os.path.join(self.memory_dir, f"{self.session_name}.json")
         # holds the ongoing chat history in memory
         self.config_path = os.path.join("config", "personality.json")
-        self.messages = self._load_memory()
-        self.session_start = datetime.now()
-        if not self.messages:
-            # Start with the system personality
-            self.messages = [{"role": "system", "content": self._load_personality()}]
-
-            # Add context from old sessions
-            self.messages += self._load_context_from_all_sessions(limit=25)
+        self.profile_path = os.path.join("config", "user_config.json")
+        # an already loaded transcript (e.g. from the GUI prefetch cache) skips the disk read
+        if transcript is None:
+            transcript = self._load_memory() if persist else Transcript()
+        self.messages = transcript
+        # everything loaded so far is history, new turns go after this point
+        self.messages.mark_session_start()
+
+        # System prompt + cross-session context, built on the first send and reused
+        # verbatim every turn; building it reads every session, so opening one stays cheap
+        self.prompt = PromptPrefix(self._build_prompt_prefix, [self.profile_path, self.config_path])
+
+    def _new_session_name(self):
+        return "session_" + datetime.now().strftime("%Y-%m-%d_%H-%M-%S")
+
+    def restamp(self):
+        # An engine built ahead of time (warm pool) gets a fresh name when it is actually used
+        if self.prompt_count == 0 and self.session_name.startswith("session_"):
+            self.session_name = self._new_session_name()
+            self.memory_file = os.path.join(self.memory_dir, f"{self.session_name}.json")
+
     def _load_memory(self):
         if os.path.exists(self.memory_file):
             try:
                 with open(self.memory_file, "r") as f:
-                    return json.load(f)
+                    return Transcript.from_json(json.load(f))
             except Exception as e:
                 print(f"[⚠️] Failed to load memory: {e}")
-        return []
-
-    def _save_memory(self):
-        try:
-            # Filter valid messages only
-            save_data = [
-                msg for msg in self.messages
-                if isinstance(msg, dict) and "role" in msg and "content" in msg
-            ]
-
-            # Add tooltip summary as metadata (but NOT part of self.messages)
-            if self.chat_initialized:
-                tooltip = self.generate_tooltip_summary()
-                metadata = {"tooltip_summary": tooltip}
-                save_data.insert(0, metadata)
+        return Transcript()
 
-            with open(self.memory_file, "w") as f:
-                json.dump(save_data, f, indent=2)
+    def send_message(self, user_input, commands=True):
+        self.last_usage = None
+        self.last_error = None
 
-        except Exception as e:
-            print(f"[❌] Failed to save memory: {e}")
-
-    def send_message(self, user_input):
         # 🔹 Handle special commands
-        command = user_input.lower()
+        command = user_input.lower() if commands else None
         if command == "get_personality":
             return f"[🧠 Personality]\n{self._load_personality()}"
         if command == "regen_personality":
@@ -88,34 +87,21 @@ class ChatEngine:
                 return f"Failed to export PDF: {e}"
 
         # 🔹 Append user's message
-        self.messages.append({
-            "role": "user",
-            "content": user_input,
-            "timestamp": datetime.now().isoformat()
-        })
+        self.messages.append("user", user_input)
         self.prompt_count += 1
 
         try:
-            # 🔹 Send only valid messages to OpenAI
-            valid_messages = [
-                m for m in self.messages
-                if isinstance(m, dict) and "role" in m and "content" in m
-            ]
-
             response = self.client.chat.completions.create(
                 model="gpt-4",
-                messages=valid_messages
+                messages=self.prompt.messages() + self.messages.outgoing()
             )
 
             reply = response.choices[0].message.content.strip()
-            self.messages.append({
-                "role": "assistant",
-                "content": reply,
-                "timestamp": datetime.now().isoformat()
-            })
+            self.last_usage = self._usage_from(response)
+            self.messages.append("assistant", reply)
 
             # 🔹 Generate a real session title after 2 messages
-            if self.prompt_count == 2 and self.session_name.startswith("session_"):
+            if self.persist and self.prompt_count == 2 and self.session_name.startswith("session_"):
                 new_title = self.generate_session_title()
                 if new_title:
                     date = datetime.now().strftime("%Y-%m-%d")
@@ -131,8 +117,30 @@ class ChatEngine:
 
         except Exception as e:
             print(f"OpenAI API error: {e}")
+            self.last_error = str(e)
             return "Sorry, something went wrong when trying to talk to OpenAI."
 
+    def _usage_from(self, response):
+        usage = getattr(response, "usage", None)
+        if usage is None:
+            return None
+        return {
+            "prompt_tokens": getattr(usage, "prompt_tokens", None),
+            "completion_tokens": getattr(usage, "completion_tokens", None),
+            "total_tokens": getattr(usage, "total_tokens", None),
+            # prompt tokens served from the provider's prefix cache
+            "cached_tokens": getattr(getattr(usage, "prompt_tokens_details", None), "cached_tokens", None),
+        }
+
+    def _build_prompt_prefix(self):
+        system_prompt = self._load_user_profile()
+        if os.path.exists(self.config_path):
+            system_prompt += "\n\n" + self._load_personality()
+
+        prefix = [{"role": "system", "content": system_prompt}]
+        if self.persist:
+            prefix += [m.to_api() for m in self._load_context_from_all_sessions(limit=25)]
+        return prefix
 
     def _load_personality(self):
         if os.path.exists(self.config_path):
@@ -179,6 +187,7 @@ class ChatEngine:
 
             with open(self.config_path, "w") as f:
                 json.dump({"profile": new_profile}, f, indent=2)
+            self.prompt.invalidate()
 
             return new_profile
 
@@ -186,18 +195,32 @@ class ChatEngine:
             return f"Failed to regenerate personality: {e}"
 
     def _load_context_from_all_sessions(self,limit=25):
-        all_files = glob.glob(os.path.join(self.memory_dir, "*.json"))
+        # sorted files + timestamp order keep the context identical between engines
+        all_files = sorted(glob.glob(os.path.join(self.memory_dir, "*.json")))
+        current_file = os.path.abspath(self.memory_file)
         all_context = []
-    
+        # sessions saved before the prompt prefix existed embed their own copy of the
+        # context, so anything already in the loaded transcript is not sent twice
+        seen = {(m.role, m.content, m.timestamp) for m in self.messages}
+
         for file in all_files:
+            if os.path.abspath(file) == current_file:
+                continue
             try:
                 with open(file, "r") as f:
                     data = json.load(f)
-                    for msg in data:
-                        if msg["role"] in ["user","assistant"]:
+                    for entry in data:
+                        msg = Message.from_dict(entry)
+                        if msg is None or msg.role not in ["user","assistant"]:
+                            continue
+                        # older sessions saved copies of their context, only keep one
+                        key = (msg.role, msg.content, msg.timestamp)
+                        if key not in seen:
+                            seen.add(key)
                             all_context.append(msg)
             except Exception as e:
                 print(f"[⚠️] Skipping corrupt memory file {file}: {e}")
+        all_context.sort(key=lambda m: m.timestamp or "")
         return all_context[-limit:]
 
     def summarize_session(self):
@@ -214,11 +237,7 @@ class ChatEngine:
 
 
 
-            session_messages = [
-                msg for msg in self.messages
-                if msg["role"] in ["user", "assistant"]
-                and datetime.fromisoformat(msg.get("timestamp", "1900-01-01")) >= self.session_start
-            ]
+            session_messages = self.messages.session_dialog()
 
             session_messages.append({
                 "role": "user",
@@ -243,11 +262,7 @@ class ChatEngine:
                 "Examples: python_loops, brewing_basics, ai_personality_reset"
             )
 
-            session_messages = [
-                msg for msg in self.messages
-                if msg["role"] in ["user", "assistant"]
-                and datetime.fromisoformat(msg.get("timestamp", "1900-01-01")) >= self.session_start
-            ]
+            session_messages = self.messages.session_dialog()
 
             session_messages.append({"role": "user", "content": title_prompt})
 
@@ -267,11 +282,7 @@ class ChatEngine:
                 "In one sentence, describe what this chat session is about. "
                 "Keep it short, clear, and without quotes or emojis."
             )
-            messages = [
-                msg for msg in self.messages
-                if msg["role"] in ["user", "assistant"]
-                and datetime.fromisoformat(msg.get("timestamp", "1900-01-01")) >= self.session_start
-            ]
+            messages = self.messages.session_dialog()
             messages.append({"role": "user", "content": quick_prompt})
 
             response = self.client.chat.completions.create(
@@ -285,10 +296,9 @@ class ChatEngine:
             return "No summary available."
 
     def _load_user_profile(self):
-        path = os.path.join("config", "user_config.json")
-        if os.path.exists(path):
+        if os.path.exists(self.profile_path):
             try:
-                with open(path, "r") as f:
+                with open(self.profile_path, "r") as f:
                     data = json.load(f)
                     name = data.get("name", "the user")
                     tone = data.get("tone", "friendly")
@@ -303,13 +313,17 @@ class ChatEngine:
         return "You are a helpful AI assistant."
 
     def _save_memory(self):
+        if not self.persist:
+            return
         try:
-            data = self.messages.copy()
-            if self.chat_initialized and not any(m.get("tooltip_summary") for m in data):
-                tooltip = self.generate_tooltip_summary()
-                data.insert(0, {"tooltip_summary": tooltip})
-
-            with open(self.memory_file, "w") as f:
-                json.dump(data, f, indent=2)
+            # Tooltip summary is kept as metadata, not as part of the messages
+            if self.chat_initialized and not self.messages.metadata.get("tooltip_summary"):
+                self.messages.metadata["tooltip_summary"] = self.generate_tooltip_summary()
+
+            # write then swap, so other engines scanning memory/ never read a half-written file
+            tmp_path = self.memory_file + ".tmp"
+            with open(tmp_path, "w") as f:
+                json.dump(self.messages.to_json(), f, indent=2)
+            os.replace(tmp_path, self.memory_file)
         except Exception as e:
             print(f"[❌] Failed to save memory: {e}")
\ No newline at end of file
@@ -1,5 +1,9 @@
 # app/main.py
 
+import argparse
+import sys
+
+from .batch import BATCH_MEMORY_DIR, run_batch
 from .chat_engine import ChatEngine
 
 def run_chat():
@@ -14,6 +18,49 @@ def run_chat():
 
         reply = ai.send_message(user_input)
         print(f"AI: {reply}\n")
+        if ai.last_usage:
+            # stderr, so it stays out of the way when the chat output is redirected
+            print(
+                f"[tokens] prompt: {ai.last_usage['prompt_tokens']}, "
+                f"cached: {ai.last_usage['cached_tokens']}",
+                file=sys.stderr
+            )
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="ThatsMyAI command line chat")
+    parser.add_argument("--batch", metavar="FILE", nargs="?", const="-",
+                        help="read JSONL prompts from FILE (or stdin) instead of chatting interactively")
+    parser.add_argument("--output", metavar="FILE", default="-",
+                        help="where to write JSONL replies in batch mode (default: stdout)")
+    parser.add_argument("--concurrency", type=int, default=4,
+                        help="max sessions processed at the same time in batch mode")
+    parser.add_argument("--memory-dir", default=BATCH_MEMORY_DIR,
+                        help=f"where batch sessions are stored (default: {BATCH_MEMORY_DIR})")
+    parser.add_argument("--no-history", action="store_true",
+                        help="batch mode: don't load or save any session history, for reproducible runs")
+    parser.add_argument("--export", metavar="ARCHIVE",
+                        help="pack all sessions and config into a single archive file")
+    parser.add_argument("--import", dest="import_path", metavar="ARCHIVE",
+                        help="restore sessions and config from an archive, skipping identical files")
+    parser.add_argument("--force", action="store_true",
+                        help="when importing, replace local files that differ from the archive")
+    args = parser.parse_args(argv)
+
+    if args.export:
+        from .archive import export_archive
+        count = export_archive(args.export)
+        print(f"Exported {count} files to {args.export}")
+    elif args.import_path:
+        from .archive import import_archive
+        stats = import_archive(args.import_path, force=args.force)
+        print(
+            f"Imported {stats['written']} new files, overwrote {stats['overwritten']}, "
+            f"skipped {stats['skipped']} unchanged and {stats['conflicts']} differing local files"
+        )
+    elif args.batch:
+        run_batch(args.batch, args.output, args.concurrency, args.memory_dir, not args.no_history)
+    else:
+        run_chat()
 
 if __name__ == "__main__":
-    run_chat()
+    main()
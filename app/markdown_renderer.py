@@ -0,0 +1,52 @@
+# app/markdown_renderer.py
+
+import hashlib
+import threading
+from collections import OrderedDict
+
+import markdown2
+
+EXTRAS = ["fenced-code-blocks"]
+
+
+class MarkdownRenderer:
+    """Markdown -> HTML with a bounded LRU keyed by a hash of the text.
+
+    Shared by the chat window and the PDF exporter so each message is only
+    converted once, no matter how often it is displayed or exported.
+    """
+
+    def __init__(self, max_entries=512):
+        self.max_entries = max_entries
+        self.cache = OrderedDict()
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def _convert(self, text):
+        return markdown2.markdown(text, extras=EXTRAS)
+
+    def render(self, text):
+        key = hashlib.sha1(text.encode("utf-8")).hexdigest()
+        with self.lock:
+            html = self.cache.get(key)
+            if html is not None:
+                self.cache.move_to_end(key)
+                self.hits += 1
+                return html
+            self.misses += 1
+
+        html = self._convert(text)
+        with self.lock:
+            self.cache[key] = html
+            while len(self.cache) > self.max_entries:
+                self.cache.popitem(last=False)
+        return html
+
+    def warm(self, texts):
+        # used from background threads so the UI later only hits the cache
+        for text in texts:
+            self.render(text)
+
+
+renderer = MarkdownRenderer()
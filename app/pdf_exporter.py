@@ -1,8 +1,9 @@
 import os
 from datetime import datetime
-import markdown2
 from weasyprint import HTML
 
+from .markdown_renderer import renderer
+
 class PDFExporter:
     def __init__(self, session_name, summary_text):
         self.session_name = session_name
@@ -12,7 +13,7 @@ class PDFExporter:
 
     def export(self):
         # Convert markdown to HTML
-        html_content = markdown2.markdown(self.summary_text, extras=["fenced-code-blocks"])
+        html_content = renderer.render(self.summary_text)
 
         # Wrap in full HTML document with minimal styling
         full_html = f"""
@@ -0,0 +1,41 @@
+# app/prompt_builder.py
+
+import os
+
+
+class PromptPrefix:
+    """The part of every request that comes before the conversation.
+
+    `build` returns the system and context messages. The result is kept and
+    sent unchanged on every turn so the provider can reuse its prefix cache;
+    it is only rebuilt when one of `watch_paths` changes on disk or
+    invalidate() is called.
+    """
+
+    def __init__(self, build, watch_paths=()):
+        self.build = build
+        self.watch_paths = list(watch_paths)
+        self.builds = 0
+        self._messages = None
+        self._signature = None
+
+    def _current_signature(self):
+        signature = []
+        for path in self.watch_paths:
+            try:
+                stat = os.stat(path)
+                signature.append((stat.st_mtime_ns, stat.st_size))
+            except OSError:
+                signature.append(None)
+        return tuple(signature)
+
+    def messages(self):
+        signature = self._current_signature()
+        if self._messages is None or signature != self._signature:
+            self._messages = self.build()
+            self._signature = signature
+            self.builds += 1
+        return self._messages
+
+    def invalidate(self):
+        self._messages = None
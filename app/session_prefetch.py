@@ -0,0 +1,175 @@
+# app/session_prefetch.py
+
+import json
+import os
+import sys
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+from .chat_engine import ChatEngine
+from .transcript import Transcript
+
+
+class SessionPrefetcher:
+    """Loads session transcripts in the background so switching sessions is instant.
+
+    Recently used and hovered sessions are kept in a bounded LRU cache (checked
+    against the file's mtime, so a session saved since it was cached is
+    reloaded). One ChatEngine is also kept pre-built for the next "New Session";
+    it is built on its own worker so it never delays transcript prefetches.
+    """
+
+    def __init__(self, memory_dir="memory", max_sessions=20, engine_factory=ChatEngine, on_load=None):
+        self.memory_dir = memory_dir
+        self.max_sessions = max_sessions
+        self.engine_factory = engine_factory
+        # optional callback run on the worker thread with each freshly loaded session
+        self.on_load = on_load
+        self.executor = ThreadPoolExecutor(max_workers=2)
+        self.engine_executor = ThreadPoolExecutor(max_workers=1)
+        self.lock = threading.Lock()
+        # session name -> (mtime, raw json data, approximate bytes in memory)
+        self.cache = OrderedDict()
+        self.inflight = {}
+        # (generation, future) of the pre-built engine; bumping generation marks it stale
+        self.warm = None
+        self.generation = 0
+        self.hits = 0
+        self.misses = 0
+
+    def _path(self, name):
+        return os.path.join(self.memory_dir, f"{name}.json")
+
+    def _mtime(self, name):
+        try:
+            return os.path.getmtime(self._path(name))
+        except OSError:
+            return None
+
+    def _load(self, name):
+        path = self._path(name)
+        try:
+            mtime = os.path.getmtime(path)
+            with open(path, "r") as f:
+                data = json.load(f)
+            size = _deep_size(data)
+        except Exception as e:
+            print(f"[⚠️] Failed to prefetch {name}: {e}")
+            with self.lock:
+                self.inflight.pop(name, None)
+            return None
+
+        with self.lock:
+            self.cache[name] = (mtime, data, size)
+            self.cache.move_to_end(name)
+            while len(self.cache) > self.max_sessions:
+                self.cache.popitem(last=False)
+            self.inflight.pop(name, None)
+
+        if self.on_load:
+            try:
+                self.on_load(data)
+            except Exception as e:
+                print(f"[⚠️] Prefetch hook failed for {name}: {e}")
+        return data
+
+    def prefetch(self, name):
+        with self.lock:
+            cached = self.cache.get(name)
+            if name in self.inflight or (cached and cached[0] == self._mtime(name)):
+                return
+            self.inflight[name] = self.executor.submit(self._load, name)
+
+    def get(self, name):
+        """Return a fresh Transcript for `name`, from cache when possible."""
+        with self.lock:
+            cached = self.cache.get(name)
+            future = self.inflight.get(name)
+            if cached and cached[0] == self._mtime(name):
+                self.cache.move_to_end(name)
+                self.hits += 1
+                return Transcript.from_json(cached[1])
+            self.misses += 1
+
+        data = future.result() if future else self._load(name)
+        if data is None:
+            return None
+        return Transcript.from_json(data)
+
+    def discard(self, name):
+        with self.lock:
+            self.cache.pop(name, None)
+
+    def mark_engine_stale(self):
+        """The context changed (new messages, new personality), the warm engine is out of date."""
+        with self.lock:
+            self.generation += 1
+
+    def warm_engine(self):
+        """Build the engine for the next take_engine() call, unless it is already fresh."""
+        with self.lock:
+            if self.warm is not None:
+                generation, future = self.warm
+                # a running build is never doubled up, _warm_done redoes it if it went stale
+                if generation == self.generation or not future.done():
+                    return
+            future = self.engine_executor.submit(self._build_engine)
+            self.warm = (self.generation, future)
+        future.add_done_callback(self._warm_done)
+
+    def _build_engine(self):
+        engine = self.engine_factory()
+        # build the prompt prefix (reads every session) here instead of on the first send
+        engine.prompt.messages()
+        return engine
+
+    def _warm_done(self, future):
+        with self.lock:
+            stale = self.warm is not None and self.warm[1] is future and self.warm[0] != self.generation
+        if stale:
+            self.warm_engine()
+
+    def take_engine(self):
+        with self.lock:
+            warm, self.warm = self.warm, None
+            fresh = warm is not None and warm[0] == self.generation
+        engine = None
+        if fresh:
+            try:
+                engine = warm[1].result()
+                engine.restamp()
+            except Exception as e:
+                print(f"[⚠️] Warm engine failed, building a new one: {e}")
+        if engine is None:
+            engine = self.engine_factory()
+        self.warm_engine()
+        return engine
+
+    def stats(self):
+        with self.lock:
+            lookups = self.hits + self.misses
+            return {
+                "sessions": len(self.cache),
+                "memory_bytes": sum(entry[2] for entry in self.cache.values()),
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+                "engine_ready": bool(
+                    self.warm and self.warm[0] == self.generation and self.warm[1].done()
+                )
+            }
+
+    def shutdown(self):
+        self.executor.shutdown(wait=False, cancel_futures=True)
+        self.engine_executor.shutdown(wait=False, cancel_futures=True)
+
+
+def _deep_size(obj):
+    # rough size of parsed JSON (dicts, lists, strings, numbers) in memory
+    size = sys.getsizeof(obj)
+    if isinstance(obj, dict):
+        size += sum(_deep_size(k) + _deep_size(v) for k, v in obj.items())
+    elif isinstance(obj, list):
+        size += sum(_deep_size(item) for item in obj)
+    return size
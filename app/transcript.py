@@ -0,0 +1,102 @@
+# app/transcript.py
+
+from datetime import datetime
+
+
+class Message:
+    __slots__ = ("role", "content", "timestamp")
+
+    def __init__(self, role, content, timestamp=None):
+        self.role = role
+        self.content = content
+        # ISO string as saved; it sorts chronologically, so it is never parsed
+        self.timestamp = timestamp
+
+    @classmethod
+    def now(cls, role, content):
+        return cls(role, content, datetime.now().isoformat())
+
+    @classmethod
+    def from_dict(cls, data):
+        if not isinstance(data, dict) or "role" not in data or "content" not in data:
+            return None
+        return cls(data["role"], data["content"], data.get("timestamp"))
+
+    def to_dict(self):
+        data = {"role": self.role, "content": self.content}
+        if self.timestamp:
+            data["timestamp"] = self.timestamp
+        return data
+
+    def to_api(self):
+        return {"role": self.role, "content": self.content}
+
+
+class Transcript:
+    """Ordered list of Messages for one chat session.
+
+    Everything before `session_start` was loaded from the session's file
+    (earlier turns); everything after it was said in this run of the session,
+    so the current session's messages are a slice instead of a timestamp scan.
+    The API view of the messages is built incrementally and cached; it leaves
+    out system messages, which come from the engine's prompt prefix instead.
+    """
+
+    def __init__(self, messages=None, metadata=None):
+        self.messages = list(messages or [])
+        self.metadata = dict(metadata or {})
+        self.session_start = len(self.messages)
+        self._outgoing = []
+        self._outgoing_upto = 0
+
+    @classmethod
+    def from_json(cls, data):
+        messages = []
+        metadata = {}
+        for entry in data or []:
+            msg = Message.from_dict(entry)
+            if msg is not None:
+                messages.append(msg)
+            elif isinstance(entry, dict):
+                # e.g. {"tooltip_summary": "..."} stored at the top of the file
+                metadata.update(entry)
+        return cls(messages, metadata)
+
+    def to_json(self):
+        data = [msg.to_dict() for msg in self.messages]
+        if self.metadata:
+            data.insert(0, dict(self.metadata))
+        return data
+
+    def __len__(self):
+        return len(self.messages)
+
+    def __iter__(self):
+        return iter(self.messages)
+
+    def __bool__(self):
+        return bool(self.messages)
+
+    def mark_session_start(self):
+        self.session_start = len(self.messages)
+
+    def append(self, role, content):
+        msg = Message.now(role, content)
+        self.messages.append(msg)
+        return msg
+
+    def session_messages(self):
+        return self.messages[self.session_start:]
+
+    def session_dialog(self):
+        """API dicts for this session's user/assistant turns."""
+        return [m.to_api() for m in self.session_messages() if m.role in ("user", "assistant")]
+
+    def outgoing(self):
+        """API dicts for the conversation, extended only with what is new since last call."""
+        for msg in self.messages[self._outgoing_upto:]:
+            if msg.role != "system":
+                self._outgoing.append(msg.to_api())
+        self._outgoing_upto = len(self.messages)
+        # a copy, so callers can append to it without corrupting the cache
+        return list(self._outgoing)